@@ -3,18 +3,38 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import functools
+import hashlib
+import json
 import logging
+import math
 import sys
+import threading
+import weakref
+from collections import OrderedDict
+from contextvars import ContextVar
 from typing import TYPE_CHECKING, Any
 
-from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager
+import anyio
+from google.adk.tools.mcp_tool.mcp_session_manager import (
+    MCPSessionManager,
+    StdioConnectionParams,
+)
+
+try:
+    from mcp.shared.exceptions import MCPError as McpError
+except ImportError:  # pragma: no cover - mcp < 2.0
+    from mcp.shared.exceptions import (  # type: ignore[attr-defined,no-redef,unused-ignore]
+        McpError,
+    )
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
     from typing import TextIO
 
     from google.adk.tools.mcp_tool.mcp_session_manager import (
         SseConnectionParams,
-        StdioConnectionParams,
         StreamableHTTPConnectionParams,
     )
     from mcp import ClientSession, StdioServerParameters
@@ -31,6 +51,343 @@ logger = logging.getLogger(__name__)
 # AWS ALB default idle timeout is 60s; ping before that to keep connections alive
 DEFAULT_PING_INTERVAL_SECONDS = 50.0
 SESSION_KEY_LOG_LENGTH = 8
+# Distinct header sets whose session keys are remembered per manager
+SESSION_KEY_CACHE_SIZE = 256
+# Failures that mean the connection is gone; anything else is a bug
+PING_CONNECTION_ERRORS = (
+    ConnectionError,
+    OSError,
+    McpError,
+    # Raised by the session's transport streams once they are torn down
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+)
+
+# Timing wheel resolution: one revolution spans exactly one ping interval in
+# 1s ticks, up to 64 slots. Longer intervals stretch the tick instead.
+PING_TICK_SECONDS = 1.0
+PING_WHEEL_SLOTS = 64
+# How long close() waits for in-flight pings to be answered before cancelling
+# them
+SHUTDOWN_TIMEOUT_SECONDS = 1.0
+
+
+# Collects the session key MCPSessionManager.create_session derives, so the
+# override can reuse it instead of merging and hashing the headers again. A
+# context variable rather than an attribute keeps concurrent calls apart.
+_session_key_sink: ContextVar[list[str] | None] = ContextVar(
+    "_session_key_sink", default=None
+)
+
+
+def _short_key(session_key: str) -> str:
+    """Return truncated session key for logging."""
+    return session_key[:SESSION_KEY_LOG_LENGTH]
+
+
+def _streams_closed(session: Any) -> bool:
+    """Report a session closed if either transport stream is (mcp 1.x)."""
+    return bool(session._read_stream._closed or session._write_stream._closed)
+
+
+def _dispatcher_closed(session: Any) -> bool:
+    """Report a session closed if its dispatcher is (mcp 2.x)."""
+    return bool(session._dispatcher._closed)
+
+
+def _hash_session_key(header_items: frozenset[tuple[str, str]]) -> str:
+    """Derive a session key from header items.
+
+    Serializes the items like the parent does, so values of different types
+    such as 1 and "1" stay distinct, but hashes them with BLAKE2b instead of
+    MD5. The key only has to tell header sets apart.
+    """
+    raw = json.dumps(dict(header_items), sort_keys=True)
+    return "session_" + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+class _PingEntry:
+    """Per-session bookkeeping held in the timing wheel.
+
+    The session is only weakly referenced, so a session nobody else holds
+    can be collected instead of being kept alive by its keep-alive pings.
+    """
+
+    __slots__ = (
+        "is_disconnected",
+        "ping",
+        "ping_count",
+        "session_key",
+        "session_ref",
+        "short_key",
+        "slot",
+    )
+
+    def __init__(
+        self,
+        session: ClientSession,
+        session_key: str,
+        slot: int,
+        is_disconnected: Callable[[ClientSession], bool],
+    ) -> None:
+        self.session_ref = weakref.ref(session)
+        self.is_disconnected = is_disconnected
+        self.session_key = session_key
+        self.short_key = _short_key(session_key)
+        self.slot = slot
+        self.ping_count = 0
+        # In flight ping, if any; at most one per session so a stalled
+        # server cannot accumulate ping tasks
+        self.ping: asyncio.Task[Any] | None = None
+
+
+class _PingScheduler:
+    """Hashed timing wheel that pings every registered session from one timer.
+
+    Sessions are bucketed into slots by the tick at which their next ping is
+    due. A single event-loop timer fires the pings for every session in a
+    slot, then sleeps straight through any empty slots to the next occupied
+    one, so scheduling costs one timer handle and no coroutine regardless of
+    how many sessions are registered, and a lone session costs one wakeup per
+    interval. Sessions that register within the same tick share a wakeup.
+
+    Every session uses the same interval and one revolution of the wheel is
+    exactly one interval, so a session stays in its slot for its lifetime.
+
+    Registering a session is a set insert, and the timer only runs while the
+    wheel holds sessions, so short-lived sessions never cost a task.
+    """
+
+    def __init__(self, ping_interval: float) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            ping_interval: Seconds between pings for each session.
+        """
+        slot_count = min(
+            max(1, math.ceil(ping_interval / PING_TICK_SECONDS)), PING_WHEEL_SLOTS
+        )
+        self._tick_seconds = ping_interval / slot_count
+        # A ping unanswered by then is abandoned, so a stalled pong cannot
+        # hold up the session's next ping
+        self._ping_timeout = ping_interval / 2
+        self.slots: list[set[_PingEntry]] = [set() for _ in range(slot_count)]
+        # Ticks are counted from _epoch, and tick N is due at exactly
+        # _epoch + N * _tick_seconds, so processing latency never accumulates
+        # into drift
+        self._epoch = 0.0
+        self.current_tick = 0
+        self._next_tick = 0
+        # session_key -> entry, for O(1) lookup and cancellation
+        self._entries: dict[str, _PingEntry] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        # Strong references to in-flight pings; the event loop only keeps
+        # weak ones to tasks
+        self._pings: set[asyncio.Task[Any]] = set()
+
+    def __contains__(self, session_key: object) -> bool:
+        return session_key in self._entries
+
+    def is_scheduled(self, session: ClientSession, session_key: str) -> bool:
+        """Report whether the session is already registered under the key."""
+        entry = self._entries.get(session_key)
+        return entry is not None and entry.session_ref() is session
+
+    def register(
+        self,
+        session: ClientSession,
+        session_key: str,
+        is_disconnected: Callable[[ClientSession], bool],
+    ) -> bool:
+        """Schedule pings for a session.
+
+        A session that replaces an older one under the same key drops the
+        old entry and, like any new session, is first pinged a full interval
+        after the tick in progress.
+
+        Args:
+            session: Session to ping.
+            session_key: Key the session is registered under.
+            is_disconnected: Predicate checked before each ping; pinging
+                stops once it reports the session disconnected.
+
+        Returns:
+            False if the session was already scheduled, True otherwise.
+        """
+        if self.is_scheduled(session, session_key):
+            return False
+        current = self._entries.get(session_key)
+        if current is not None:
+            self.slots[current.slot].discard(current)
+
+        loop = asyncio.get_running_loop()
+        idle = self._timer is None
+        if idle:
+            self._epoch = loop.time()
+            self.current_tick = 0
+            tick = 0
+        else:
+            # Ticks before the armed one are empty and so never fired; stay
+            # short of the armed tick in case the loop is running late, and
+            # never fall behind the tick that last fired, which float
+            # truncation can do when the clock sits exactly on its deadline
+            elapsed = int((loop.time() - self._epoch) / self._tick_seconds)
+            tick = max(self.current_tick, min(elapsed, self._next_tick - 1))
+
+        # The slot for the tick in progress is next due a full revolution,
+        # i.e. one interval, from now
+        entry = _PingEntry(
+            session, session_key, tick % len(self.slots), is_disconnected
+        )
+        self.slots[entry.slot].add(entry)
+        self._entries[session_key] = entry
+
+        if idle:
+            self._arm_next_tick()
+        return True
+
+    def unregister(self, session_key: str) -> None:
+        """Stop pinging the session registered under the given key."""
+        entry = self._entries.pop(session_key, None)
+        if entry is not None:
+            self.slots[entry.slot].discard(entry)
+
+    def stop(self) -> list[asyncio.Task[Any]]:
+        """Forget all sessions and cancel the timer.
+
+        Returns:
+            The pings still in flight.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pings = list(self._pings)
+        self._pings.clear()
+        self._entries.clear()
+        for slot in self.slots:
+            slot.clear()
+        return pings
+
+    def _arm_next_tick(self) -> None:
+        """Set the timer for the next occupied slot, or go idle if none."""
+        slot_count = len(self.slots)
+        for step in range(1, slot_count + 1):
+            if self.slots[(self.current_tick + step) % slot_count]:
+                break
+        else:
+            # Nothing left to ping; register() starts the timer again
+            self._timer = None
+            return
+
+        # A deadline already in the past fires straight away, so a late tick
+        # catches up instead of pushing every later slot back
+        self._next_tick = self.current_tick + step
+        self._timer = asyncio.get_running_loop().call_at(
+            self._epoch + self._next_tick * self._tick_seconds, self._on_tick
+        )
+
+    def _on_tick(self) -> None:
+        """Ping every session in the slot that has come due."""
+        self.current_tick = self._next_tick
+
+        due = self.slots[self.current_tick % len(self.slots)]
+        # Loop invariants, bound once per tick rather than looked up per
+        # session
+        timeout = self._ping_timeout
+        pings = self._pings
+        forget_ping = pings.discard
+        ping_done = self._ping_done
+        try:
+            # Snapshot: disconnected sessions are dropped from the slot below
+            for entry in list(due):
+                try:
+                    session = entry.session_ref()
+                    if session is None or entry.is_disconnected(session):
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(
+                                "Session %s %s, stopping pings",
+                                entry.short_key,
+                                "collected" if session is None else "disconnected",
+                            )
+                        due.discard(entry)
+                        del self._entries[entry.session_key]
+                        continue
+
+                    if entry.ping is not None:
+                        # Previous ping still awaiting its reply; skip this round
+                        continue
+
+                    # Fire and forget: a slow pong must not hold up the other
+                    # sessions due on this tick.
+                    entry.ping_count += 1
+                    ping = asyncio.create_task(
+                        asyncio.wait_for(session.send_ping(), timeout),
+                        name=f"ping_{entry.short_key}",
+                    )
+                    entry.ping = ping
+                    pings.add(ping)
+                    ping.add_done_callback(forget_ping)
+                    ping.add_done_callback(functools.partial(ping_done, entry))
+                except Exception:
+                    # Only this session stops being pinged; the rest of the
+                    # slot, and every later slot, carry on
+                    logger.exception(
+                        "Unexpected error pinging session %s", entry.short_key
+                    )
+                    if self._entries.get(entry.session_key) is entry:
+                        self.unregister(entry.session_key)
+        finally:
+            # Always re-arm: a fired handle left in _timer would keep
+            # register() from ever restarting the wheel
+            self._arm_next_tick()
+
+    def _ping_done(self, entry: _PingEntry, ping: asyncio.Task[Any]) -> None:
+        """Stop pinging a session whose ping failed.
+
+        A ping that times out only frees the session's slot for the next
+        round: a server busy with a long tool call may be slow to answer,
+        and that is exactly when the keep-alive matters. Connection failures
+        are expected and logged at debug level; any other error is logged
+        with its traceback rather than swallowed.
+        """
+        entry.ping = None
+        if ping.cancelled():
+            return
+
+        error = ping.exception()
+        if error is None:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Ping #%d sent for session %s", entry.ping_count, entry.short_key
+                )
+            return
+
+        # Checked before connection errors: on 3.11+ TimeoutError is an OSError
+        if isinstance(error, asyncio.TimeoutError):
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Ping #%d timed out for session %s",
+                    entry.ping_count,
+                    entry.short_key,
+                )
+            return
+
+        if not isinstance(error, PING_CONNECTION_ERRORS):
+            logger.error(
+                "Unexpected error pinging session %s",
+                entry.short_key,
+                exc_info=error,
+            )
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Ping failed for session %s: %s", entry.short_key, error)
+        if self._entries.get(entry.session_key) is entry:
+            self.unregister(entry.session_key)
+
+
+def _stop_and_cancel(scheduler: _PingScheduler) -> None:
+    """Stop a scheduler and cancel its in-flight pings without waiting."""
+    for ping in scheduler.stop():
+        ping.cancel()
 
 
 class PingEnabledSessionManager(MCPSessionManager):
@@ -60,106 +417,205 @@ class PingEnabledSessionManager(MCPSessionManager):
         """
         super().__init__(connection_params=connection_params, errlog=errlog)
         self._ping_interval = ping_interval
-        self._ping_tasks: dict[str, asyncio.Task[Any]] = {}
-        self._ping_task_lock = asyncio.Lock()
+        self._session_key_cache: OrderedDict[frozenset[tuple[str, str]] | None, str] = (
+            OrderedDict()
+        )
+        # Headers and key of the most recent lookup, checked before the
+        # cache; a client with a single connection always hits it
+        self._last_session_key: tuple[dict[str, str] | None, str] | None = None
+        # Sessions may be created from several event loops, each on its own
+        # thread; every loop gets its own wheel so a session is only ever
+        # pinged, and its wheel only touched, from the loop it belongs to
+        self._ping_schedulers: dict[asyncio.AbstractEventLoop, _PingScheduler] = {}
+        self._ping_schedulers_lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Exclude the schedulers, their lock and the key caches from pickling.
+
+        The key caches hold request headers, which can carry credentials.
+        """
+        state: dict[str, Any] = super().__getstate__()  # type: ignore[no-untyped-call]
+        state["_session_key_cache"] = OrderedDict()
+        state["_last_session_key"] = None
+        state["_ping_schedulers"] = {}
+        state.pop("_ping_schedulers_lock", None)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """Restore the members excluded from pickling."""
+        super().__setstate__(state)  # type: ignore[no-untyped-call]
+        self._session_key_cache = OrderedDict()
+        self._last_session_key = None
+        self._ping_schedulers = {}
+        self._ping_schedulers_lock = threading.Lock()
 
     async def create_session(
         self, headers: dict[str, str] | None = None
     ) -> ClientSession:
-        """Create a session and start a ping task for it."""
-        session = await super().create_session(headers=headers)
-        session_key = self._get_session_key(headers)
-        await self._start_ping_task_if_needed(session, session_key)
+        """Create a session and schedule keep-alive pings for it."""
+        sink: list[str] = []
+        token = _session_key_sink.set(sink)
+        try:
+            session = await super().create_session(headers=headers)
+        finally:
+            _session_key_sink.reset(token)
+
+        session_key = sink[0] if sink else self._get_session_key(headers)
+        self._schedule_pings(session, session_key)
         return session
 
+    def _generate_session_key(
+        self, merged_headers: dict[str, str] | None = None
+    ) -> str:
+        """Generate the session key, recording it for create_session.
+
+        Keys are cached by header contents, so a header set that is reused
+        across sessions is only sorted, serialized and hashed once. The cache
+        is per manager, so connection params need no part in the cache key.
+        Headers equal to the previous call's skip the cache altogether.
+        """
+        last = self._last_session_key
+        if last is not None and last[0] == merged_headers:
+            session_key = last[1]
+        else:
+            session_key = self._cached_session_key(merged_headers)
+
+        sink = _session_key_sink.get()
+        if sink is not None and not sink:
+            sink.append(session_key)
+        return session_key
+
+    def _cached_session_key(self, merged_headers: dict[str, str] | None) -> str:
+        """Look up or derive the session key in the LRU cache."""
+        try:
+            cache_key = frozenset(merged_headers.items()) if merged_headers else None
+        except TypeError:
+            # Unhashable header values, such as lists, cannot key the cache
+            return super()._generate_session_key(merged_headers)
+        # pop and re-insert rather than move_to_end: the parent is used from
+        # more than one thread, and a concurrent eviction must not raise here
+        session_key = self._session_key_cache.pop(cache_key, None)
+        if session_key is None:
+            if cache_key is not None and not isinstance(
+                self._connection_params, StdioConnectionParams
+            ):
+                session_key = _hash_session_key(cache_key)
+            else:
+                # Constant keys for stdio and header-less connections
+                session_key = super()._generate_session_key(merged_headers)
+            if len(self._session_key_cache) >= SESSION_KEY_CACHE_SIZE:
+                self._session_key_cache.popitem(last=False)
+        self._session_key_cache[cache_key] = session_key
+        # A single tuple assignment, so other threads never see a torn pair
+        self._last_session_key = (
+            dict(merged_headers) if merged_headers is not None else None,
+            session_key,
+        )
+        return session_key
+
     def _get_session_key(self, headers: dict[str, str] | None) -> str:
         """Generate the session key from headers."""
         merged_headers = self._merge_headers(headers)
         return self._generate_session_key(merged_headers)
 
-    def _short_key(self, session_key: str) -> str:
-        """Return truncated session key for logging."""
-        return session_key[:SESSION_KEY_LOG_LENGTH]
-
-    async def _start_ping_task_if_needed(
-        self, session: ClientSession, session_key: str
-    ) -> None:
-        """Start a ping task for the session if one isn't already running."""
-        async with self._ping_task_lock:
-            if session_key not in self._ping_tasks:
-                task = asyncio.create_task(
-                    self._ping_loop(session, session_key),
-                    name=f"ping_loop_{self._short_key(session_key)}",
-                )
-                self._ping_tasks[session_key] = task
-                logger.debug(
-                    "Started ping task for session %s (interval: %.1fs)",
-                    self._short_key(session_key),
-                    self._ping_interval,
-                )
+    def _select_disconnect_check(
+        self, session: ClientSession
+    ) -> Callable[[ClientSession], bool]:
+        """Choose the disconnect probe to check before each of a session's pings.
 
-    async def _ping_loop(self, session: ClientSession, session_key: str) -> None:
-        """Send periodic pings until the session disconnects or is cancelled."""
-        short_key = self._short_key(session_key)
-        ping_count = 0
-
-        try:
-            while True:
-                await asyncio.sleep(self._ping_interval)
-
-                if self._is_session_disconnected(session):
-                    logger.debug("Session %s disconnected, stopping pings", short_key)
-                    break
+        Picks a direct attribute probe for the session layout of the installed
+        mcp release, mirroring _is_session_disconnected without its per-call
+        hasattr/getattr chain. An override of _is_session_disconnected, or a
+        session with neither layout, gets _is_session_disconnected itself.
+        """
+        if (
+            "_is_session_disconnected" in vars(self)
+            or type(self)._is_session_disconnected
+            is not MCPSessionManager._is_session_disconnected
+        ):
+            return self._is_session_disconnected
+        if hasattr(session, "_read_stream"):
+            if hasattr(session._read_stream, "_closed") and hasattr(
+                getattr(session, "_write_stream", None), "_closed"
+            ):
+                return _streams_closed
+            return self._is_session_disconnected
+        if hasattr(getattr(session, "_dispatcher", None), "_closed"):
+            return _dispatcher_closed
+        return self._is_session_disconnected
 
-                ping_count += 1
-                await session.send_ping()
-                logger.debug("Ping #%d sent for session %s", ping_count, short_key)
+    def _get_ping_scheduler(self) -> _PingScheduler:
+        """Return the ping scheduler for the running event loop."""
+        loop = asyncio.get_running_loop()
+        scheduler = self._ping_schedulers.get(loop)
+        if scheduler is None:
+            with self._ping_schedulers_lock:
+                scheduler = self._ping_schedulers.get(loop)
+                if scheduler is None:
+                    # Forget wheels of loops that have since been closed
+                    self._ping_schedulers = {
+                        other: other_scheduler
+                        for other, other_scheduler in self._ping_schedulers.items()
+                        if not other.is_closed()
+                    }
+                    scheduler = _PingScheduler(self._ping_interval)
+                    self._ping_schedulers[loop] = scheduler
+        return scheduler
 
-        except asyncio.CancelledError:
+    def _schedule_pings(self, session: ClientSession, session_key: str) -> None:
+        """Register the session with the ping scheduler if it isn't already."""
+        scheduler = self._get_ping_scheduler()
+        # create_session hands back the cached session on every reuse; only
+        # a session new to the wheel needs its disconnect probe picked
+        if scheduler.is_scheduled(session, session_key):
+            return
+        scheduled = scheduler.register(
+            session, session_key, self._select_disconnect_check(session)
+        )
+        if scheduled and logger.isEnabledFor(logging.DEBUG):
             logger.debug(
-                "Ping loop cancelled for session %s after %d pings",
-                short_key,
-                ping_count,
+                "Scheduled pings for session %s (interval: %.1fs)",
+                _short_key(session_key),
+                self._ping_interval,
             )
-            raise
-        except Exception as e:
-            logger.debug("Ping failed for session %s: %s", short_key, e)
-        finally:
-            await self._cleanup_ping_task(session_key)
-
-    async def _cleanup_ping_task(self, session_key: str) -> None:
-        """Remove the ping task reference for a session."""
-        async with self._ping_task_lock:
-            self._ping_tasks.pop(session_key, None)
 
     async def close(self) -> None:
-        """Cancel all ping tasks and close sessions."""
+        """Stop pinging and close sessions."""
         await self._cancel_all_ping_tasks()
         await super().close()  # type: ignore[no-untyped-call]
 
     async def _cancel_all_ping_tasks(self) -> None:
-        """Cancel and await all running ping tasks."""
-        # Take snapshot and clear under lock to avoid deadlock with _cleanup_ping_task
-        async with self._ping_task_lock:
-            tasks_to_cancel = list(self._ping_tasks.items())
-            self._ping_tasks.clear()
-
-        # Cancel and await outside the lock
-        for session_key, task in tasks_to_cancel:
+        """Stop every loop's ping timer and wait for this loop's pings."""
+        current_loop = asyncio.get_running_loop()
+        with self._ping_schedulers_lock:
+            schedulers = self._ping_schedulers
+            self._ping_schedulers = {}
+
+        tasks_to_cancel: list[asyncio.Task[Any]] = []
+        for loop, scheduler in schedulers.items():
+            if loop is current_loop:
+                # No lock needed: stop() snapshots and clears without yielding
+                tasks_to_cancel = scheduler.stop()
+            elif not loop.is_closed():
+                # Another loop's timer and pings can only be touched from its
+                # own thread, and its pings cannot be awaited from here
+
+                # RuntimeError: the loop closed in the meantime, and its timer
+                # went with it
+                with contextlib.suppress(RuntimeError):
+                    loop.call_soon_threadsafe(_stop_and_cancel, scheduler)
+
+        # In-flight pings are left to finish; only cancel whatever overruns
+        # the timeout
+        if tasks_to_cancel:
+            await asyncio.wait(tasks_to_cancel, timeout=SHUTDOWN_TIMEOUT_SECONDS)
+        for task in tasks_to_cancel:
             task.cancel()
-            await self._await_task_cancellation(task, session_key)
 
-    async def _await_task_cancellation(
-        self, task: asyncio.Task[Any], session_key: str
-    ) -> None:
-        """Await a cancelled task, logging any unexpected errors."""
-        try:
-            await task
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            logger.warning(
-                "Error cancelling ping task for %s: %s",
-                self._short_key(session_key),
-                e,
-            )
+        # Await every cancellation in a single pass rather than one by one
+        results = await asyncio.gather(*tasks_to_cancel, return_exceptions=True)
+        for task, result in zip(tasks_to_cancel, results, strict=True):
+            if isinstance(result, BaseException) and not isinstance(
+                result, asyncio.CancelledError
+            ):
+                logger.warning("Error cancelling %s: %s", task.get_name(), result)
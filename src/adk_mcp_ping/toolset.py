@@ -101,7 +101,10 @@ class PingEnabledMcpToolset(McpToolset):
             header_provider=header_provider,
         )
 
-        # Replace the default session manager with our ping-enabled version
+        # Replace the default session manager with our ping-enabled version.
+        # McpToolset offers no way to inject one, and swapping the class it
+        # instantiates would not be thread-safe; the discarded default only
+        # allocates empty containers and locks, so building it is cheap.
         self._mcp_session_manager = PingEnabledSessionManager(
             connection_params=connection_params,
             ping_interval=ping_interval,
@@ -1,11 +1,31 @@
 """Pytest configuration and shared fixtures."""
 
-from __future__ import annotations
-
+import asyncio
+from collections.abc import Callable
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop does not support Windows
+    uvloop = None
+
+
+if uvloop is not None:
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_asyncio_loop_factories(
+        config: pytest.Config, item: pytest.Item
+    ) -> dict[str, Callable[[], asyncio.AbstractEventLoop]]:
+        """Run async tests on uvloop, whose timers are far more precise.
+
+        The ping tests measure pings sent over a few short intervals, so
+        timer slop on the default loop eats directly into their margin.
+        pytest-asyncio releases without this hook use the default loop.
+        """
+        return {"uvloop": uvloop.new_event_loop}
+
 
 @pytest.fixture
 def mock_client_session() -> MagicMock:
@@ -15,9 +35,43 @@ def mock_client_session() -> MagicMock:
     return session
 
 
+class FakeSession:
+    """Minimal ClientSession stand-in that counts pings without Mock overhead."""
+
+    def __init__(self) -> None:
+        self.send_ping_count = 0
+
+    async def send_ping(self) -> None:
+        self.send_ping_count += 1
+
+
+@pytest.fixture
+def fake_client_session() -> FakeSession:
+    """Create a lightweight fake MCP ClientSession for timing-sensitive tests."""
+    return FakeSession()
+
+
 @pytest.fixture
 def mock_connection_params() -> MagicMock:
     """Create mock connection parameters."""
     params = MagicMock()
     params.url = "http://localhost:8000/mcp"
     return params
+
+
+@pytest.fixture(scope="session")
+def shared_parent_create_session() -> AsyncMock:
+    """Stand-in for MCPSessionManager.create_session, built once per run.
+
+    Tests install it with monkeypatch and must reset it before use.
+    """
+    return AsyncMock()
+
+
+@pytest.fixture(scope="session")
+def shared_parent_close() -> AsyncMock:
+    """Stand-in for MCPSessionManager.close, built once per run.
+
+    Tests install it with monkeypatch and must reset it before use.
+    """
+    return AsyncMock()
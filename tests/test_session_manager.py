@@ -1,17 +1,61 @@
-"""Tests for PingEnabledSessionManager."""
+"""Tests for PingEnabledSessionManager.
 
-from __future__ import annotations
+Hooks called on every scheduler tick, such as _is_session_disconnected, are
+replaced with plain functions rather than Mock objects: MagicMock records
+every call and is far slower to invoke, which eats into the few intervals a
+timing-bounded test gets to observe.
+"""
 
 import asyncio
+import gc
+import hashlib
+import logging
+import pickle
+import threading
+import weakref
+from collections.abc import Callable
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import anyio
 import pytest
 
 from adk_mcp_ping.session_manager import (
     DEFAULT_PING_INTERVAL_SECONDS,
+    PING_WHEEL_SLOTS,
+    SESSION_KEY_CACHE_SIZE,
     PingEnabledSessionManager,
+    _hash_session_key,
+    _PingScheduler,
 )
 
+from .conftest import FakeSession
+
+
+def _scheduler(manager: PingEnabledSessionManager) -> _PingScheduler:
+    """Return the manager's ping scheduler for the running event loop."""
+    return manager._get_ping_scheduler()
+
+
+async def _wait_until(
+    condition: Callable[[], bool], timeout: float = 1.0, poll: float = 0.005
+) -> None:
+    """Poll until condition holds, failing the test after timeout seconds."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met"
+        await asyncio.sleep(poll)
+
+
+async def _close(manager: PingEnabledSessionManager) -> None:
+    """Close the manager without touching real MCP sessions."""
+    with patch.object(
+        PingEnabledSessionManager.__bases__[0],
+        "close",
+        new_callable=AsyncMock,
+    ):
+        await manager.close()
+
 
 class TestPingEnabledSessionManager:
     """Tests for PingEnabledSessionManager class."""
@@ -22,84 +66,435 @@ class TestPingEnabledSessionManager:
         assert DEFAULT_PING_INTERVAL_SECONDS < 60.0
         assert DEFAULT_PING_INTERVAL_SECONDS > 0
 
-    @pytest.mark.asyncio
-    async def test_sends_pings_at_default_interval(
-        self, mock_connection_params: MagicMock, mock_client_session: MagicMock
+    @pytest.mark.parametrize(
+        ("ping_interval", "expected_slots", "expected_tick"),
+        [
+            (DEFAULT_PING_INTERVAL_SECONDS, 50, 1.0),
+            (0.05, 1, 0.05),
+            (320.0, PING_WHEEL_SLOTS, 5.0),
+        ],
+    )
+    def test_wheel_spans_one_interval(
+        self, ping_interval: float, expected_slots: int, expected_tick: float
+    ) -> None:
+        """Verify one revolution of the timing wheel is one ping interval."""
+        scheduler = _PingScheduler(ping_interval)
+
+        assert len(scheduler.slots) == expected_slots
+        assert scheduler._tick_seconds == pytest.approx(expected_tick)
+
+    @pytest.mark.parametrize(
+        ("kwargs", "expected_interval"),
+        [({}, DEFAULT_PING_INTERVAL_SECONDS), ({"ping_interval": 30.0}, 30.0)],
+    )
+    def test_init(
+        self,
+        mock_connection_params: MagicMock,
+        kwargs: dict[str, float],
+        expected_interval: float,
     ) -> None:
-        """Test that pings are sent at the default interval."""
-        # Use a fast interval for testing, but verify the default is wired correctly
+        """Verify the ping interval and that no session is scheduled yet."""
         manager = PingEnabledSessionManager(
-            connection_params=mock_connection_params,
+            connection_params=mock_connection_params, **kwargs
         )
-        # The manager should use the constant as default
-        assert manager._ping_interval == DEFAULT_PING_INTERVAL_SECONDS
+
+        assert manager._ping_interval == expected_interval
+        assert not manager._ping_schedulers
 
     @pytest.mark.asyncio
     async def test_sends_pings_at_custom_interval(
-        self, mock_connection_params: MagicMock, mock_client_session: MagicMock
+        self, mock_connection_params: MagicMock, fake_client_session: FakeSession
     ) -> None:
         """Test that pings are sent at a custom interval."""
-        ping_interval = 0.05  # 50ms for fast testing
+        ping_interval = 0.02  # 20ms for fast testing
         manager = PingEnabledSessionManager(
             connection_params=mock_connection_params,
             ping_interval=ping_interval,
         )
-        manager._is_session_disconnected = MagicMock(return_value=False)
+        manager._is_session_disconnected = lambda _s: False
 
-        # Start ping loop
-        task = asyncio.create_task(manager._ping_loop(mock_client_session, "test_key"))
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        manager._schedule_pings(fake_client_session, "test_key")
 
         # Wait for approximately 3 intervals
         await asyncio.sleep(ping_interval * 3.5)
+        elapsed = loop.time() - started_at
 
-        task.cancel()
-        try:
-            await task
-        except asyncio.CancelledError:
-            pass
+        await _close(manager)
+
+        # One ping per elapsed interval, give or take one for timer jitter
+        expected = int(elapsed / ping_interval)
+        assert abs(fake_client_session.send_ping_count - expected) <= 1
 
-        # Should have sent approximately 3 pings (timing can vary slightly)
-        assert mock_client_session.send_ping.call_count >= 2
-        assert mock_client_session.send_ping.call_count <= 4
+    @pytest.mark.asyncio
+    async def test_slow_ping_does_not_delay_next_ping(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that ping latency is not added on top of the interval."""
+        ping_interval = 0.05
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=ping_interval,
+        )
+        manager._is_session_disconnected = lambda _s: False
+        loop = asyncio.get_running_loop()
+        sent_at: list[float] = []
+
+        async def slow_ping() -> None:
+            sent_at.append(loop.time())
+            await asyncio.sleep(0.04)
+
+        # Held here: the scheduler only keeps a weak reference
+        session = MagicMock(send_ping=slow_ping)
+        manager._schedule_pings(session, "test_key")
+        await _wait_until(lambda: len(sent_at) >= 2)
+        await _close(manager)
+
+        # Second ping follows one interval after the first, not interval + 0.04
+        assert sent_at[1] - sent_at[0] == pytest.approx(ping_interval, abs=0.02)
 
     @pytest.mark.asyncio
     async def test_create_session_starts_pinging(
-        self, mock_connection_params: MagicMock, mock_client_session: MagicMock
+        self,
+        mock_connection_params: MagicMock,
+        mock_client_session: MagicMock,
+        monkeypatch: pytest.MonkeyPatch,
+        shared_parent_create_session: AsyncMock,
+        shared_parent_close: AsyncMock,
     ) -> None:
         """Test that creating a session starts the ping loop."""
+        shared_parent_create_session.reset_mock()
+        shared_parent_create_session.return_value = mock_client_session
+        shared_parent_close.reset_mock()
+        base = PingEnabledSessionManager.__bases__[0]
+        monkeypatch.setattr(base, "create_session", shared_parent_create_session)
+        monkeypatch.setattr(base, "close", shared_parent_close)
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=0.05,
+        )
+        manager._merge_headers = MagicMock(return_value={})
+        manager._generate_session_key = MagicMock(return_value="test_session_key")
+        manager._is_session_disconnected = lambda _s: False
+
+        session = await manager.create_session()
+
+        assert session == mock_client_session
+
+        # Wait for at least one ping to be sent
+        await asyncio.sleep(0.1)
+
+        # Verify pings are being sent
+        assert mock_client_session.send_ping.call_count >= 1
+
+        # Clean up
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_create_session_reuses_parent_session_key(
+        self, mock_connection_params: MagicMock, mock_client_session: MagicMock
+    ) -> None:
+        """Test that the session key derived by the parent is not recomputed."""
         manager = PingEnabledSessionManager(
             connection_params=mock_connection_params,
             ping_interval=0.05,
         )
+        manager._merge_headers = MagicMock(return_value={})
+        base = PingEnabledSessionManager.__bases__[0]
+
+        async def parent_create_session(
+            self: PingEnabledSessionManager, headers: dict[str, str] | None = None
+        ) -> MagicMock:
+            self._generate_session_key(self._merge_headers(headers))
+            return mock_client_session
+
+        with (
+            patch.object(base, "create_session", parent_create_session),
+            patch.object(
+                base, "_generate_session_key", return_value="test_session_key"
+            ) as generate_session_key,
+        ):
+            await manager.create_session()
+
+        assert generate_session_key.call_count == 1
+        assert manager._merge_headers.call_count == 1
+        assert "test_session_key" in _scheduler(manager)
+
+        await _close(manager)
+
+    def test_caches_session_keys_by_headers(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that each distinct header set is only hashed once."""
+        manager = PingEnabledSessionManager(connection_params=mock_connection_params)
+
+        with patch(
+            "adk_mcp_ping.session_manager.hashlib.blake2b", wraps=hashlib.blake2b
+        ) as blake2b:
+            first = manager._generate_session_key({"a": "1", "b": "2"})
+            second = manager._generate_session_key({"b": "2", "a": "1"})
+            other = manager._generate_session_key({"a": "2"})
+
+        assert first == second
+        assert other != first
+        assert blake2b.call_count == 2
+
+    def test_session_keys_tell_value_types_apart(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that header values equal as strings still get distinct keys."""
+        manager = PingEnabledSessionManager(connection_params=mock_connection_params)
+
+        int_key = manager._generate_session_key({"x-n": 1})
+        str_key = manager._generate_session_key({"x-n": "1"})
+
+        assert int_key != str_key
+
+    def test_keeps_constant_keys_without_headers(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that header-less and stdio sessions keep the parent's keys."""
+        from mcp import StdioServerParameters
+
+        manager = PingEnabledSessionManager(connection_params=mock_connection_params)
+        stdio_manager = PingEnabledSessionManager(
+            connection_params=StdioServerParameters(command="mcp-server")
+        )
+
+        assert manager._generate_session_key(None) == "session_no_headers"
+        assert manager._generate_session_key({}) == "session_no_headers"
+        assert stdio_manager._generate_session_key({"a": "1"}) == "stdio_session"
+
+    def test_session_key_cache_is_bounded(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that the least recently used session keys are evicted."""
+        manager = PingEnabledSessionManager(connection_params=mock_connection_params)
+
+        for i in range(SESSION_KEY_CACHE_SIZE + 1):
+            manager._generate_session_key({"x-request": str(i)})
+
+        assert len(manager._session_key_cache) == SESSION_KEY_CACHE_SIZE
+        assert frozenset({("x-request", "0")}) not in manager._session_key_cache
+
+    def test_singleton_fast_path_skips_key_gen(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that repeating the last headers bypasses the key cache."""
+        manager = PingEnabledSessionManager(connection_params=mock_connection_params)
+        first = manager._generate_session_key({"x-user": "alice"})
+        manager._session_key_cache = MagicMock()
+        manager._session_key_cache.pop.side_effect = AssertionError
+
+        with patch(
+            "adk_mcp_ping.session_manager._hash_session_key",
+            side_effect=AssertionError,
+        ):
+            assert manager._generate_session_key({"x-user": "alice"}) == first
+
+    def test_unhashable_header_values_bypass_the_cache(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that list-valued headers fall back to the parent's key."""
+        manager = PingEnabledSessionManager(connection_params=mock_connection_params)
+        headers = {"x-roles": ["admin", "dev"]}
+
+        session_key = manager._generate_session_key(headers)
+
+        base = PingEnabledSessionManager.__bases__[0]
+        assert session_key == base._generate_session_key(manager, headers)
+        assert not manager._session_key_cache
+        assert manager._last_session_key is None
+
+    def test_pickling_drops_cached_headers(self) -> None:
+        """Test that headers held by the key caches are not pickled."""
+        from google.adk.tools.mcp_tool.mcp_session_manager import (
+            StreamableHTTPConnectionParams,
+        )
+
+        manager = PingEnabledSessionManager(
+            connection_params=StreamableHTTPConnectionParams(url="http://mcp")
+        )
+        manager._generate_session_key({"Authorization": "Bearer secret-token"})
+
+        data = pickle.dumps(manager)
+        restored = pickle.loads(data)
+
+        assert b"secret-token" not in data
+        assert not restored._session_key_cache
+        assert restored._last_session_key is None
+
+    @pytest.mark.parametrize(
+        ("session", "expected"),
+        [
+            (
+                SimpleNamespace(
+                    _read_stream=SimpleNamespace(_closed=False),
+                    _write_stream=SimpleNamespace(_closed=True),
+                ),
+                True,
+            ),
+            (
+                SimpleNamespace(
+                    _read_stream=SimpleNamespace(_closed=False),
+                    _write_stream=SimpleNamespace(_closed=False),
+                ),
+                False,
+            ),
+            (SimpleNamespace(_dispatcher=SimpleNamespace(_closed=True)), True),
+            (SimpleNamespace(_dispatcher=SimpleNamespace(_closed=False)), False),
+            (
+                SimpleNamespace(
+                    _read_stream=SimpleNamespace(), _write_stream=SimpleNamespace()
+                ),
+                False,
+            ),
+            (SimpleNamespace(), False),
+        ],
+    )
+    def test_disconnect_check_matches_parent(
+        self, mock_connection_params: MagicMock, session: object, expected: bool
+    ) -> None:
+        """Verify the selected disconnect probe agrees with the parent's check."""
+        manager = PingEnabledSessionManager(connection_params=mock_connection_params)
+
+        is_disconnected = manager._select_disconnect_check(session)
+
+        assert manager._is_session_disconnected(session) is expected
+        assert is_disconnected(session) is expected
+
+    @pytest.mark.asyncio
+    async def test_reused_session_skips_disconnect_probe_selection(
+        self, mock_connection_params: MagicMock, fake_client_session: FakeSession
+    ) -> None:
+        """Test that a session already on the wheel is not probed again."""
+        manager = PingEnabledSessionManager(connection_params=mock_connection_params)
 
         with patch.object(
-            PingEnabledSessionManager.__bases__[0],
-            "create_session",
-            new_callable=AsyncMock,
-            return_value=mock_client_session,
+            manager,
+            "_select_disconnect_check",
+            wraps=manager._select_disconnect_check,
+        ) as select:
+            manager._schedule_pings(fake_client_session, "test_key")
+            manager._schedule_pings(fake_client_session, "test_key")
+
+        assert select.call_count == 1
+        assert "test_key" in _scheduler(manager)
+
+        await _close(manager)
+
+    @pytest.mark.asyncio
+    async def test_reconnect_reuses_cached_session_key(
+        self, mock_connection_params: MagicMock, mock_client_session: MagicMock
+    ) -> None:
+        """Test that re-creating a session with the same headers skips hashing."""
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=0.05,
+        )
+        manager._merge_headers = MagicMock(return_value={"x-user": "alice"})
+
+        async def parent_create_session(
+            self: PingEnabledSessionManager, headers: dict[str, str] | None = None
+        ) -> MagicMock:
+            self._generate_session_key(self._merge_headers(headers))
+            return mock_client_session
+
+        with (
+            patch.object(
+                PingEnabledSessionManager.__bases__[0],
+                "create_session",
+                parent_create_session,
+            ),
+            patch(
+                "adk_mcp_ping.session_manager._hash_session_key",
+                wraps=_hash_session_key,
+            ) as hash_session_key,
         ):
-            manager._merge_headers = MagicMock(return_value={})
-            manager._generate_session_key = MagicMock(return_value="test_session_key")
-            manager._is_session_disconnected = MagicMock(return_value=False)
+            await manager.create_session()
+            await manager.create_session()
 
-            session = await manager.create_session()
+        assert hash_session_key.call_count == 1
 
-            assert session == mock_client_session
+        await _close(manager)
 
-            # Wait for at least one ping to be sent
-            await asyncio.sleep(0.1)
+    @pytest.mark.asyncio
+    async def test_sessions_share_one_timer(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that all sessions are pinged without a background task each."""
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=0.05,
+        )
+        manager._is_session_disconnected = lambda _s: False
+        sessions = [FakeSession() for _ in range(5)]
+
+        tasks_before = len(asyncio.all_tasks())
+        for i, session in enumerate(sessions):
+            manager._schedule_pings(session, f"key{i}")
 
-            # Verify pings are being sent
-            assert mock_client_session.send_ping.call_count >= 1
+        assert len(asyncio.all_tasks()) == tasks_before
+        assert _scheduler(manager)._timer is not None
 
-            # Clean up
-            await manager.close()
+        await asyncio.sleep(0.12)
+        await _close(manager)
+
+        for session in sessions:
+            assert session.send_ping_count >= 1
+
+    @pytest.mark.asyncio
+    async def test_sleeps_through_empty_slots(
+        self, mock_connection_params: MagicMock, fake_client_session: FakeSession
+    ) -> None:
+        """Test that a lone session wakes the loop once per interval, not per tick."""
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=10.0,
+        )
+        loop = asyncio.get_running_loop()
+
+        manager._schedule_pings(fake_client_session, "test_key")
+        timer = _scheduler(manager)._timer
+
+        assert timer is not None
+        assert timer.when() - loop.time() == pytest.approx(10.0, abs=0.1)
+
+        await _close(manager)
+
+    @pytest.mark.asyncio
+    async def test_register_never_lands_behind_the_fired_tick(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that a session registered on a deadline is not a revolution late."""
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=10.0,
+        )
+        first, second = FakeSession(), FakeSession()
+        manager._schedule_pings(first, "first_key")
+        scheduler = _scheduler(manager)
+        loop = asyncio.get_running_loop()
+
+        # As if tick 10 has just fired with the wheel re-armed a revolution
+        # out, while the clock reads a hair before tick 10's deadline
+        scheduler.current_tick = 10
+        scheduler._next_tick = 20
+        scheduler._epoch = loop.time() - 9.5 * scheduler._tick_seconds
+        manager._schedule_pings(second, "second_key")
+
+        # Due with the armed tick, one interval out, not in the slot that
+        # has just passed
+        assert scheduler._entries["second_key"].slot == 0
+
+        await _close(manager)
 
     @pytest.mark.asyncio
     async def test_stops_pinging_when_session_disconnects(
         self, mock_connection_params: MagicMock, mock_client_session: MagicMock
     ) -> None:
-        """Test that ping loop stops when session disconnects."""
+        """Test that pinging stops when session disconnects."""
         manager = PingEnabledSessionManager(
             connection_params=mock_connection_params,
             ping_interval=0.05,
@@ -115,72 +510,405 @@ class TestPingEnabledSessionManager:
 
         manager._is_session_disconnected = check_disconnected
 
-        # Run ping loop - should exit on its own
-        await asyncio.wait_for(
-            manager._ping_loop(mock_client_session, "test_key"),
-            timeout=1.0,
-        )
+        manager._schedule_pings(mock_client_session, "test_key")
+        await asyncio.sleep(0.2)
 
         # Should have stopped after detecting disconnect
+        assert "test_key" not in _scheduler(manager)
         assert mock_client_session.send_ping.call_count <= 1
 
+        # With no sessions left the timer stops until the next one
+        assert _scheduler(manager)._timer is None
+        manager._schedule_pings(MagicMock(send_ping=AsyncMock()), "other_key")
+        assert _scheduler(manager)._timer is not None
+
+        await _close(manager)
+
+    @pytest.mark.asyncio
+    async def test_stops_pinging_when_dispatcher_closes(
+        self, mock_connection_params: MagicMock, fake_client_session: FakeSession
+    ) -> None:
+        """Test that the probe picked at registration sees the session close."""
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=0.05,
+        )
+        dispatcher = SimpleNamespace(_closed=False)
+        fake_client_session._dispatcher = dispatcher
+
+        manager._schedule_pings(fake_client_session, "test_key")
+        await asyncio.sleep(0.07)
+        dispatcher._closed = True
+        await asyncio.sleep(0.1)
+
+        assert "test_key" not in _scheduler(manager)
+        assert fake_client_session.send_ping_count == 1
+
+        await _close(manager)
+
     @pytest.mark.asyncio
     async def test_stops_pinging_on_connection_error(
         self, mock_connection_params: MagicMock, mock_client_session: MagicMock
     ) -> None:
-        """Test that ping loop stops gracefully on ping error."""
+        """Test that pinging stops gracefully on ping error."""
         manager = PingEnabledSessionManager(
             connection_params=mock_connection_params,
             ping_interval=0.05,
         )
-        manager._is_session_disconnected = MagicMock(return_value=False)
-        mock_client_session.send_ping.side_effect = Exception("Connection lost")
+        manager._is_session_disconnected = lambda _s: False
+        mock_client_session.send_ping.side_effect = ConnectionError("Connection lost")
 
-        # Run ping loop - should exit on its own due to error
-        await asyncio.wait_for(
-            manager._ping_loop(mock_client_session, "test_key"),
-            timeout=1.0,
-        )
+        manager._schedule_pings(mock_client_session, "test_key")
+        await asyncio.sleep(0.2)
 
-        # Should have tried exactly one ping before error stopped the loop
+        # Should have tried exactly one ping before error stopped pinging
+        assert "test_key" not in _scheduler(manager)
         assert mock_client_session.send_ping.call_count == 1
 
+        await _close(manager)
+
     @pytest.mark.asyncio
-    async def test_close_stops_all_pinging(
-        self, mock_connection_params: MagicMock, mock_client_session: MagicMock
+    async def test_stops_pinging_when_session_is_collected(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that the scheduler does not keep abandoned sessions alive."""
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=0.05,
+        )
+        manager._is_session_disconnected = lambda _s: False
+        session = FakeSession()
+        session_ref = weakref.ref(session)
+
+        manager._schedule_pings(session, "test_key")
+        del session
+        gc.collect()
+
+        assert session_ref() is None
+        await asyncio.sleep(0.1)
+        assert "test_key" not in _scheduler(manager)
+        # Nothing is left running on behalf of the collected session
+        assert _scheduler(manager)._timer is None
+        assert not _scheduler(manager)._pings
+
+        await _close(manager)
+
+    @pytest.mark.asyncio
+    async def test_stops_pinging_on_closed_stream(
+        self,
+        mock_connection_params: MagicMock,
+        mock_client_session: MagicMock,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        """Test that a torn-down transport stream is an expected ping failure."""
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=0.05,
+        )
+        manager._is_session_disconnected = lambda _s: False
+        mock_client_session.send_ping.side_effect = anyio.ClosedResourceError()
+
+        manager._schedule_pings(mock_client_session, "test_key")
+        await asyncio.sleep(0.1)
+
+        assert "test_key" not in _scheduler(manager)
+        assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+        await _close(manager)
+
+    @pytest.mark.asyncio
+    async def test_logs_unexpected_ping_errors(
+        self,
+        mock_connection_params: MagicMock,
+        mock_client_session: MagicMock,
+        caplog: pytest.LogCaptureFixture,
     ) -> None:
-        """Test that close() stops all ping loops."""
+        """Test that programmer errors in a ping are reported, not swallowed."""
         manager = PingEnabledSessionManager(
             connection_params=mock_connection_params,
             ping_interval=0.05,
         )
-        manager._is_session_disconnected = MagicMock(return_value=False)
+        manager._is_session_disconnected = lambda _s: False
+        mock_client_session.send_ping.side_effect = TypeError("bad arg")
+
+        manager._schedule_pings(mock_client_session, "test_key")
+        await asyncio.sleep(0.1)
+
+        errors = [r for r in caplog.records if r.levelno >= logging.ERROR]
+        assert len(errors) == 1
+        assert errors[0].exc_info is not None
+        assert isinstance(errors[0].exc_info[1], TypeError)
+        assert "test_key" not in _scheduler(manager)
+
+        await _close(manager)
+
+    @pytest.mark.asyncio
+    async def test_failing_disconnect_check_only_drops_its_session(
+        self, mock_connection_params: MagicMock, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """Test that one session's failing probe does not stop the others."""
+        broken, healthy, late = FakeSession(), FakeSession(), FakeSession()
+
+        class BrokenProbeManager(PingEnabledSessionManager):
+            def _is_session_disconnected(self, session: object) -> bool:
+                if session is broken:
+                    raise RuntimeError("probe failed")
+                return False
+
+        manager = BrokenProbeManager(
+            connection_params=mock_connection_params,
+            ping_interval=0.05,
+        )
+        manager._schedule_pings(broken, "broken_key")
+        manager._schedule_pings(healthy, "healthy_key")
+        await asyncio.sleep(0.07)
+        manager._schedule_pings(late, "late_key")
+        await asyncio.sleep(0.1)
 
-        # Start multiple ping tasks via the manager's tracking
-        task1 = asyncio.create_task(manager._ping_loop(mock_client_session, "key1"))
-        task2 = asyncio.create_task(manager._ping_loop(mock_client_session, "key2"))
+        assert "broken_key" not in _scheduler(manager)
+        assert healthy.send_ping_count >= 2
+        assert late.send_ping_count >= 1
+        errors = [r for r in caplog.records if r.levelno >= logging.ERROR]
+        assert len(errors) == 1
+        assert errors[0].exc_info is not None
+        assert isinstance(errors[0].exc_info[1], RuntimeError)
 
-        async with manager._ping_task_lock:
-            manager._ping_tasks = {"key1": task1, "key2": task2}
+        await _close(manager)
 
+    @pytest.mark.asyncio
+    async def test_close_stops_all_pinging(
+        self,
+        mock_connection_params: MagicMock,
+        mock_client_session: MagicMock,
+        monkeypatch: pytest.MonkeyPatch,
+        shared_parent_close: AsyncMock,
+    ) -> None:
+        """Test that close() stops all pinging."""
+        shared_parent_close.reset_mock()
+        monkeypatch.setattr(
+            PingEnabledSessionManager.__bases__[0], "close", shared_parent_close
+        )
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=0.05,
+        )
+        manager._is_session_disconnected = lambda _s: False
+
+        manager._schedule_pings(mock_client_session, "key1")
+        other_session = MagicMock(send_ping=AsyncMock())
+        manager._schedule_pings(other_session, "key2")
         # Let some pings happen
         await asyncio.sleep(0.1)
-        pings_before_close = mock_client_session.send_ping.call_count
+        scheduler = _scheduler(manager)
+        timer = scheduler._timer
+        assert timer is not None
 
-        with patch.object(
-            PingEnabledSessionManager.__bases__[0],
-            "close",
-            new_callable=AsyncMock,
-        ):
-            await manager.close()
+        await manager.close()
+        shared_parent_close.assert_awaited_once()
+        pings_after_close = mock_client_session.send_ping.call_count
 
-        # Both tasks should be done
-        assert task1.cancelled() or task1.done()
-        assert task2.cancelled() or task2.done()
+        # The timer should be cancelled and no sessions left scheduled
+        assert scheduler._timer is None
+        assert timer.cancelled()
+        assert "key1" not in scheduler
+        assert "key2" not in scheduler
+        assert not manager._ping_schedulers
 
         # No more pings should be sent after close
         await asyncio.sleep(0.1)
-        assert mock_client_session.send_ping.call_count == pings_before_close
+        assert mock_client_session.send_ping.call_count == pings_after_close
+
+    @pytest.mark.asyncio
+    async def test_pings_each_session_on_its_own_loop(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that sessions created on other loops are pinged from those loops."""
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=0.02,
+        )
+        manager._is_session_disconnected = lambda _s: False
+        ping_loops: dict[str, list[asyncio.AbstractEventLoop]] = {"a": [], "b": []}
+
+        def session_for(name: str) -> MagicMock:
+            async def send_ping() -> None:
+                ping_loops[name].append(asyncio.get_running_loop())
+
+            return MagicMock(send_ping=send_ping)
+
+        async def schedule_b() -> None:
+            manager._schedule_pings(session_b, "key_b")
+
+        loop_a = asyncio.get_running_loop()
+        loop_b = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop_b.run_forever)
+        thread.start()
+        session_a, session_b = session_for("a"), session_for("b")
+        try:
+            manager._schedule_pings(session_a, "key_a")
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(schedule_b(), loop_b)
+            )
+            await asyncio.sleep(0.1)
+
+            await _close(manager)
+            # Runs after the stop close() handed to loop B
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop_b)
+            )
+            pings_after_close = len(ping_loops["b"])
+            await asyncio.sleep(0.06)
+        finally:
+            loop_b.call_soon_threadsafe(loop_b.stop)
+            thread.join()
+            loop_b.close()
+
+        assert ping_loops["a"]
+        assert set(ping_loops["a"]) == {loop_a}
+        assert ping_loops["b"]
+        assert set(ping_loops["b"]) == {loop_b}
+        # close() on loop A also stopped the wheel on loop B
+        assert len(ping_loops["b"]) == pings_after_close
+
+    @pytest.mark.asyncio
+    async def test_close_does_not_wait_for_next_ping(
+        self, mock_connection_params: MagicMock, fake_client_session: FakeSession
+    ) -> None:
+        """Test that close() returns at once rather than at the next interval."""
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=10.0,
+        )
+        manager._schedule_pings(fake_client_session, "test_key")
+        loop = asyncio.get_running_loop()
+
+        started_at = loop.time()
+        await _close(manager)
+
+        assert loop.time() - started_at < 0.01
+        assert fake_client_session.send_ping_count == 0
+
+    @pytest.mark.asyncio
+    async def test_ping_loop_times_out_slow_ping(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that an unanswered ping is abandoned and the next one still fires."""
+        ping_interval = 0.05
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=ping_interval,
+        )
+        manager._is_session_disconnected = lambda _s: False
+        loop = asyncio.get_running_loop()
+        sent_at: list[float] = []
+
+        async def stalled_ping() -> None:
+            sent_at.append(loop.time())
+            await asyncio.sleep(ping_interval * 10)
+
+        session = MagicMock(send_ping=stalled_ping)
+        manager._schedule_pings(session, "test_key")
+        await _wait_until(lambda: len(sent_at) >= 3)
+
+        # Every ping was abandoned before the next fell due, so none pile up
+        assert sent_at[2] - sent_at[1] == pytest.approx(ping_interval, abs=0.02)
+        assert "test_key" in _scheduler(manager)
+        assert len(_scheduler(manager)._pings) <= 1
+
+        await _close(manager)
+
+    @pytest.mark.asyncio
+    async def test_pong_slower_than_half_interval_keeps_pinging(
+        self, mock_connection_params: MagicMock, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """Test that a pong arriving after interval/2 is only logged at debug."""
+        ping_interval = 0.05
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=ping_interval,
+        )
+        manager._is_session_disconnected = lambda _s: False
+        sent = []
+
+        async def slow_pong() -> None:
+            sent.append(True)
+            await asyncio.sleep(0.04)
+
+        session = MagicMock(send_ping=slow_pong)
+        with caplog.at_level(logging.DEBUG, logger="adk_mcp_ping.session_manager"):
+            manager._schedule_pings(session, "test_key")
+            await _wait_until(lambda: len(sent) >= 2)
+            await _wait_until(lambda: "timed out" in caplog.text)
+
+        assert "test_key" in _scheduler(manager)
+        timeouts = [r for r in caplog.records if "timed out" in r.getMessage()]
+        assert timeouts
+        assert all(r.levelno == logging.DEBUG for r in timeouts)
+        assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+        await _close(manager)
+
+    @pytest.mark.asyncio
+    async def test_skips_ping_while_previous_is_in_flight(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that a ping still winding down is not stacked with another."""
+        ping_interval = 0.02
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=ping_interval,
+        )
+        manager._is_session_disconnected = lambda _s: False
+        release = asyncio.Event()
+        sent = []
+
+        async def stubborn_ping() -> None:
+            sent.append(True)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                # A transport whose teardown outlasts the timeout keeps the
+                # ping in flight past later ticks
+                await release.wait()
+                raise
+
+        session = MagicMock(send_ping=stubborn_ping)
+        manager._schedule_pings(session, "test_key")
+        await asyncio.sleep(ping_interval * 5)
+
+        assert sent == [True]
+        in_flight = [t for t in asyncio.all_tasks() if t.get_name() == "ping_test_key"]
+        assert len(in_flight) == 1
+
+        release.set()
+        await _wait_until(lambda: len(sent) >= 2)
+        await _close(manager)
+
+    @pytest.mark.asyncio
+    async def test_close_lets_in_flight_ping_finish(
+        self, mock_connection_params: MagicMock
+    ) -> None:
+        """Test that close() waits for a ping that is already in flight."""
+        manager = PingEnabledSessionManager(
+            connection_params=mock_connection_params,
+            ping_interval=0.05,
+        )
+        manager._is_session_disconnected = lambda _s: False
+        started = asyncio.Event()
+        completed = []
+
+        async def slow_ping() -> None:
+            started.set()
+            await asyncio.sleep(0.02)
+            completed.append(True)
+
+        session = MagicMock(send_ping=slow_ping)
+        manager._schedule_pings(session, "test_key")
+        await asyncio.wait_for(started.wait(), timeout=1.0)
+
+        await _close(manager)
+
+        assert completed == [True]
 
 
 class TestPingEnabledSessionManagerIntegration:
@@ -191,3 +919,9 @@ class TestPingEnabledSessionManagerIntegration:
         from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager
 
         assert issubclass(PingEnabledSessionManager, MCPSessionManager)
+
+    def test_logger_is_under_package_hierarchy(self) -> None:
+        """Verify log records propagate through the package logger."""
+        from adk_mcp_ping import session_manager
+
+        assert session_manager.logger.name == "adk_mcp_ping.session_manager"
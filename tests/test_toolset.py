@@ -1,9 +1,9 @@
 """Tests for PingEnabledMcpToolset."""
 
-from __future__ import annotations
-
 from unittest.mock import MagicMock
 
+import pytest
+
 from adk_mcp_ping.session_manager import (
     DEFAULT_PING_INTERVAL_SECONDS,
     PingEnabledSessionManager,
@@ -30,30 +30,27 @@ class TestPingEnabledMcpToolset:
 
         assert isinstance(toolset._mcp_session_manager, PingEnabledSessionManager)
 
+    @pytest.mark.parametrize(
+        ("interval", "expected"),
+        [(None, DEFAULT_PING_INTERVAL_SECONDS), (25.0, 25.0), (42.0, 42.0)],
+    )
     def test_passes_ping_interval_to_session_manager(
-        self, mock_connection_params: MagicMock
+        self,
+        mock_connection_params: MagicMock,
+        interval: float | None,
+        expected: float,
     ) -> None:
-        """Verify custom ping interval is passed to the session manager."""
-        custom_interval = 25.0
-        toolset = PingEnabledMcpToolset(
-            connection_params=mock_connection_params,
-            ping_interval=custom_interval,
-        )
-
-        # The session manager should receive the custom interval
-        assert toolset._mcp_session_manager._ping_interval == custom_interval
-
-    def test_uses_default_ping_interval(
-        self, mock_connection_params: MagicMock
-    ) -> None:
-        """Verify default ping interval matches the constant."""
-        toolset = PingEnabledMcpToolset(
-            connection_params=mock_connection_params,
-        )
-
-        assert (
-            toolset._mcp_session_manager._ping_interval == DEFAULT_PING_INTERVAL_SECONDS
-        )
+        """Verify the toolset and its manager get the interval, or its default."""
+        if interval is None:
+            toolset = PingEnabledMcpToolset(connection_params=mock_connection_params)
+        else:
+            toolset = PingEnabledMcpToolset(
+                connection_params=mock_connection_params, ping_interval=interval
+            )
+
+        assert toolset._ping_interval == expected
+        assert toolset._mcp_session_manager._ping_interval == expected
+        assert not toolset._mcp_session_manager._ping_schedulers
 
 
 class TestPingEnabledMcpToolsetExports: